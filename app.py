@@ -1,49 +1,196 @@
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
+from flask import Flask, request
 import numpy as np
 from PIL import Image
-import tensorflow as tf
 import requests
 import os
-import json
+import orjson
 from dotenv import load_dotenv
-import urllib.request
-import traceback  # Add for better error logging
+import threading
+import queue
+import time
+import concurrent.futures
+import logging
+
+# The server only needs the TFLite interpreter, not all of TensorFlow
+# (~500 MB RSS and seconds of import per worker). Prefer the standalone
+# tflite-runtime wheel and fall back to tf.lite for dev machines that have
+# full TensorFlow installed for training. XNNPACK SIMD kernels are enabled
+# by default in both builds.
+try:
+    from tflite_runtime.interpreter import Interpreter as TFLiteInterpreter
+except ImportError:
+    from tensorflow.lite import Interpreter as TFLiteInterpreter
 
 # Load environment variables
 load_dotenv()
 
+# One buffered logger instead of per-request print() calls — stdout flushes
+# serialize workers under gunicorn. Werkzeug's per-request access lines are
+# demoted to warnings.
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("agritech")
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
 app = Flask(__name__)
 
 # Model settings
 MODEL_PATH = "model_quant.tflite"
+ONNX_MODEL_PATH = "model.onnx"
 MODEL_URL = os.getenv("MODEL_URL")
 interpreter = None
 
-# Download model if not present
+# Optional compiled-inference path: if an ONNX export is present (produce it
+# offline with `python -m tf2onnx.convert --saved-model saved_model --output
+# model.onnx --opset 17`), prefer ONNX Runtime over the TFLite interpreter —
+# its graph-level fusion and MKL-DNN kernels are faster on server CPUs.
+onnx_session = None
+_ONNX_INPUT_NAME = None
+
+# Tensor details are fixed once the model is loaded — resolved at startup so
+# predict() doesn't re-query them per request.
+_INPUT_DETAILS = None
+_OUTPUT_DETAILS = None
+
+# Micro-batching: concurrent requests enqueue their preprocessed image and a
+# single worker thread stacks up to MAX_BATCH of them (waiting at most
+# _BATCH_WINDOW seconds for stragglers) into one interpreter.invoke(). This
+# amortizes per-call overhead and keeps all interpreter access on one thread.
+MAX_BATCH = 8
+_BATCH_WINDOW = 0.008
+_BATCH_QUEUE = queue.Queue()
+_INPUT_TENSOR = None
+
+# Download model if not present — chunked stream into a temp file with an
+# atomic rename so a crashed download can never be loaded half-written. The
+# temp name includes the pid: on a cold start every gunicorn worker runs
+# this at import, and a shared ".tmp" would have them truncating and
+# renaming each other's half-written files.
 def download_model():
-    if not os.path.exists(MODEL_PATH) and MODEL_URL:
+    if os.path.exists(MODEL_PATH):
+        return
+    if not MODEL_URL:
+        logger.warning("MODEL_URL not set!")
+        return
+    tmp_path = f"{MODEL_PATH}.{os.getpid()}.tmp"
+    try:
+        logger.info("Downloading model from %s...", MODEL_URL)
+        with _SESSION.get(MODEL_URL, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(1 << 20):
+                    f.write(chunk)
+        os.replace(tmp_path, MODEL_PATH)
+        logger.info("Model downloaded successfully.")
+    except Exception as e:
         try:
-            print(f"Downloading model from {MODEL_URL}...")
-            urllib.request.urlretrieve(MODEL_URL, MODEL_PATH)
-            print("✅ Model downloaded successfully.")
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        # Another worker may have completed its own download in the meantime —
+        # only give up if the model is genuinely still missing
+        if os.path.exists(MODEL_PATH):
+            logger.info("Model download failed but another worker provided it: %s", e)
+        else:
+            logger.error("Failed to download model: %s", e)
+
+# Load ONNX Runtime session if an export is available
+if os.path.exists(ONNX_MODEL_PATH):
+    try:
+        import onnxruntime as ort
+        sess_opts = ort.SessionOptions()
+        sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_opts.intra_op_num_threads = os.cpu_count()
+        onnx_session = ort.InferenceSession(ONNX_MODEL_PATH, sess_opts,
+                                            providers=['CPUExecutionProvider'])
+        _ONNX_INPUT_NAME = onnx_session.get_inputs()[0].name
+        logger.info("ONNX Runtime session loaded successfully.")
+    except Exception as e:
+        logger.warning("Failed to load ONNX model, falling back to TFLite: %s", e)
+        onnx_session = None
+
+# Batch worker: drains up to MAX_BATCH queued images, runs one invoke, and
+# scatters the per-image outputs back to the waiting request threads.
+def _batch_worker():
+    while True:
+        items = [_BATCH_QUEUE.get()]
+        deadline = time.monotonic() + _BATCH_WINDOW
+        while len(items) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(_BATCH_QUEUE.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            # Write each image straight into the interpreter-owned input
+            # tensor — set_tensor would memcpy the whole batch a second time.
+            # The view must be dropped before invoke() per the TFLite docs.
+            buf = _INPUT_TENSOR()
+            for i, (input_array, _, _) in enumerate(items):
+                buf[i] = input_array
+            del buf
+            interpreter.invoke()
+            output = interpreter.get_tensor(_OUTPUT_DETAILS[0]['index'])
+            for i, (_, done, result) in enumerate(items):
+                result.append(output[i].copy())
+                done.set()
         except Exception as e:
-            print(f"❌ Failed to download model: {e}")
-    elif not MODEL_URL:
-        print("❌ MODEL_URL not set!")
+            for _, done, result in items:
+                result.append(e)
+                done.set()
 
-download_model()
+# Submit one preprocessed image to the batch worker and wait for its output.
+def _run_inference(input_array):
+    done = threading.Event()
+    result = []
+    _BATCH_QUEUE.put((input_array, done, result))
+    if not done.wait(timeout=30):
+        raise RuntimeError("Inference timed out")
+    if isinstance(result[0], Exception):
+        raise result[0]
+    return result[0]
 
-# Load TFLite model
-if os.path.exists(MODEL_PATH):
+# Load TFLite model — runs on a background thread at startup (see the
+# _init_model thread below) so Flask answers health checks while the model
+# downloads; /predict returns 503 until `interpreter` is set.
+def _load_tflite_model():
+    global interpreter, _INPUT_DETAILS, _OUTPUT_DETAILS, _INPUT_TENSOR
+    if not os.path.exists(MODEL_PATH):
+        logger.error("Model file not found at %s", MODEL_PATH)
+        return
     try:
-        interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-        interpreter.allocate_tensors()
-        print("✅ TFLite model loaded successfully.")
+        loaded = TFLiteInterpreter(model_path=MODEL_PATH)
+        # Size the input for the largest batch up front so the worker never
+        # has to reallocate tensors between invokes
+        _input_index = loaded.get_input_details()[0]['index']
+        loaded.resize_tensor_input(_input_index, [MAX_BATCH, 256, 256, 3])
+        loaded.allocate_tensors()
+        _INPUT_DETAILS = loaded.get_input_details()
+        _OUTPUT_DETAILS = loaded.get_output_details()
+        # Callable returning a writable view onto the interpreter's own
+        # input buffer; stays valid because allocate_tensors() is never
+        # called again after this point
+        _INPUT_TENSOR = loaded.tensor(_INPUT_DETAILS[0]['index'])
+        # Warm-up invoke on a zeroed batch: XNNPACK does lazy kernel
+        # selection on the first run, so this keeps the cold-start spike
+        # out of the first real request
+        try:
+            _INPUT_TENSOR()[:] = 0
+            loaded.invoke()
+            logger.info("Model warmed up.")
+        except Exception as e:
+            logger.warning("Model warmup failed: %s", e)
+        interpreter = loaded
+        threading.Thread(target=_batch_worker, daemon=True).start()
+        logger.info("TFLite model loaded successfully.")
     except Exception as e:
-        print(f"❌ Failed to load TFLite model: {e}")
-else:
-    print(f"❌ Model file not found at {MODEL_PATH}")
+        logger.error("Failed to load TFLite model: %s", e)
+
+def _init_model():
+    download_model()
+    _load_tflite_model()
 
 # Constants
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
@@ -55,6 +202,32 @@ CLASS_NAMES = [
 WEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
 
+# Persistent HTTP session so outbound calls reuse the pooled TCP/TLS
+# connection instead of paying a fresh handshake every time
+_SESSION = requests.Session()
+_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=16, max_retries=1))
+
+# Pool for the weather fetch so its network latency overlaps image
+# decode + inference instead of adding to it
+_WEATHER_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# OpenWeatherMap only refreshes station data every ~10 minutes, so cache
+# responses per (lat, lon) and skip the HTTPS round-trip within the TTL
+_WEATHER_TTL = 300
+_WEATHER_CACHE = {}
+_WEATHER_CACHE_LOCK = threading.Lock()
+
+# Download and load the model off the main thread so the app can start
+# answering health checks immediately on container cold-start
+threading.Thread(target=_init_model, daemon=True).start()
+
+# Helper: build a JSON response with orjson, which encodes dicts several
+# times faster than the stdlib encoder behind flask.jsonify
+def _json_response(payload, status=200):
+    return app.response_class(orjson.dumps(payload), status=status,
+                              mimetype='application/json')
+
 # Helper: allowed file check
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -63,34 +236,31 @@ def allowed_file(filename):
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        # Log all request information for debugging
-        print("📥 Received prediction request")
-        print(f"Content-Type: {request.content_type}")
-        print(f"Form data keys: {list(request.form.keys())}")
-        print(f"Files keys: {list(request.files.keys())}")
-        
-        # Handle missing model gracefully
-        if not interpreter:
-            print("❌ Model not loaded")
+        # Handle missing model gracefully — 503 while the background
+        # download/load is still in flight
+        if not interpreter and not onnx_session:
+            logger.error("Model not loaded")
             if not os.path.exists(MODEL_PATH):
-                return jsonify({"status": "error", "message": f"Model file not found at {MODEL_PATH}"}), 500
-            return jsonify({"status": "error", "message": "Model not loaded"}), 500
+                return _json_response({"status": "error", "message": f"Model file not found at {MODEL_PATH}"}, 503)
+            return _json_response({"status": "error", "message": "Model not loaded"}, 503)
+
+        # Start the weather fetch immediately — it has no dependency on the
+        # image, so it runs while we decode and classify
+        weather_future = _WEATHER_POOL.submit(get_weather_data)
 
         sensor_data = {}
         if 'sensor_data' in request.form:
             try:
-                sensor_data = json.loads(request.form['sensor_data'])
-                print(f"📊 Sensor data received: {sensor_data}")
-            except json.JSONDecodeError as e:
-                print(f"❌ Invalid sensor data format: {e}")
-                return jsonify({"status": "error", "message": f"Invalid sensor data format: {str(e)}"}), 400
+                sensor_data = orjson.loads(request.form['sensor_data'])
+            except orjson.JSONDecodeError as e:
+                logger.warning("Invalid sensor data format: %s", e)
+                return _json_response({"status": "error", "message": f"Invalid sensor data format: {str(e)}"}, 400)
         elif request.is_json:
             # Try to get sensor data from JSON body if Content-Type is application/json
             try:
                 sensor_data = request.get_json() or {}
-                print(f"🔄 Using JSON body for sensor data: {sensor_data}")
             except Exception as e:
-                print(f"❌ Error parsing JSON body: {e}")
+                logger.warning("Error parsing JSON body: %s", e)
 
         # Process request with or without image
         has_image = 'image' in request.files and request.files['image'].filename != ''
@@ -99,53 +269,59 @@ def predict():
             file = request.files['image']
             
             if not allowed_file(file.filename):
-                print(f"❌ Invalid file type: {file.filename}")
-                return jsonify({"status": "error", "message": "Invalid file type"}), 400
+                logger.warning("Invalid file type: %s", file.filename)
+                return _json_response({"status": "error", "message": "Invalid file type"}, 400)
 
-            temp_path = None
             try:
-                filename = secure_filename(file.filename)
-                os.makedirs('uploads', exist_ok=True)
-                temp_path = os.path.join('uploads', filename)
-                file.save(temp_path)
-                print(f"✅ Image saved temporarily: {temp_path}")
-
-                img = Image.open(temp_path).convert('RGB').resize((256, 256))
-                img_array = tf.keras.preprocessing.image.img_to_array(img)
-                img_array = np.expand_dims(img_array, axis=0) / 255.0
-
-                # Prepare tensors for TFLite prediction
-                input_details = interpreter.get_input_details()
-                output_details = interpreter.get_output_details()
-                interpreter.set_tensor(input_details[0]['index'], img_array.astype(np.float32))
-                interpreter.invoke()
-                output_data = interpreter.get_tensor(output_details[0]['index'])[0]
-
-                predicted_class = CLASS_NAMES[np.argmax(output_data)]
-                confidence = float(np.max(output_data))
-                print(f"🔍 Image analysis result: {predicted_class} with {confidence:.2f} confidence")
+                # Decode straight from the upload stream — no disk round-trip.
+                # draft() lets libjpeg DCT-scale large JPEGs down toward 256px
+                # during decode, skipping most of the IDCT work for phone
+                # photos (it is a silent no-op for PNG). BILINEAR is plenty
+                # for a 256x256 model input and much cheaper than the default
+                # convolution resample.
+                img = Image.open(file.stream)
+                img.draft('RGB', (256, 256))
+                img = img.convert('RGB').resize((256, 256), Image.BILINEAR)
 
+                if onnx_session is not None:
+                    input_array = np.asarray(img, dtype=np.float32) * np.float32(1.0 / 255.0)
+                    output_data = onnx_session.run(
+                        None, {_ONNX_INPUT_NAME: input_array[np.newaxis]})[0][0]
+                    idx = int(np.argmax(output_data))
+                    predicted_class = CLASS_NAMES[idx]
+                    confidence = float(output_data[idx])
+                else:
+                    # Prepare the input for the TFLite batch worker
+                    if _INPUT_DETAILS[0]['dtype'] == np.uint8:
+                        # Fully-integer model: feed raw pixels, no scaling needed
+                        input_array = np.asarray(img, dtype=np.uint8)
+                    else:
+                        input_array = np.asarray(img, dtype=np.float32) * np.float32(1.0 / 255.0)
+                    output_data = _run_inference(input_array)
+
+                    idx = int(np.argmax(output_data))
+                    predicted_class = CLASS_NAMES[idx]
+                    if _OUTPUT_DETAILS[0]['dtype'] == np.uint8:
+                        # Dequantize only the winning score for the confidence value
+                        scale, zero_point = _OUTPUT_DETAILS[0]['quantization']
+                        confidence = float(scale * (int(output_data[idx]) - zero_point))
+                    else:
+                        confidence = float(output_data[idx])
             except Exception as e:
-                print(f"❌ Error processing image: {str(e)}")
-                print(traceback.format_exc())  # More detailed error info
-                return jsonify({"status": "error", "message": str(e)}), 500
-            finally:
-                if temp_path and os.path.exists(temp_path):
-                    os.remove(temp_path)
-                    print("🗑️ Temporary image file removed")
+                logger.exception("Error processing image")
+                return _json_response({"status": "error", "message": str(e)}, 500)
         else:
-            print("ℹ️ No image provided, skipping disease detection")
             predicted_class = "No_image_provided"
             confidence = 0.0
 
         # Process sensor data - handle missing keys safely
         sensor_insights = analyze_sensor_data(sensor_data)
         
-        # Get weather data with error handling
+        # Collect the weather result started at request entry
         try:
-            weather_data = get_weather_data()
+            weather_data = weather_future.result(timeout=5)
         except Exception as e:
-            print(f"⚠️ Error getting weather data: {str(e)}")
+            logger.warning("Error getting weather data: %s", e)
             weather_data = None
 
         response = {
@@ -163,74 +339,75 @@ def predict():
                 "recommendation": get_remedy(predicted_class)
             })
             
-        print(f"✅ Processed request successfully")
-        return jsonify(response)
+        logger.info("req sensor=%s disease=%s confidence=%.3f",
+                    sensor_data, predicted_class, confidence)
+        return _json_response(response)
     
     except Exception as e:
-        print(f"❌ Unhandled exception in predict endpoint: {str(e)}")
-        print(traceback.format_exc())  # Print traceback for debugging
-        return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+        logger.exception("Unhandled exception in predict endpoint")
+        return _json_response({"status": "error", "message": f"Server error: {str(e)}"}, 500)
+
+# Advice thresholds, constant-folded at import. Each entry pairs the sensor
+# keys (snake_case plus the camelCase alias the ESP32 firmware sends) with
+# ascending bands of (upper_bound, bound_inclusive, message): the reading
+# takes the first band it falls under, where bound_inclusive says whether
+# the bound itself belongs to the band — this mirrors the mixed </>=
+# comparisons of the original ladder exactly. A None bound has no upper
+# limit; a None message means no advice for that range. Light readings are
+# inverted by the LDR circuit — lower numbers mean brighter.
+_SENSOR_RULES = (
+    (("temperature",), (
+        (15, False, "Temperature is low (below 15°C) — crop growth might slow down."),
+        (25, True, "Temperature is in optimal range for potato growth."),
+        (35, True, None),
+        (None, True, "Temperature is high (above 35°C) — consider shade or irrigation to cool plants."),
+    )),
+    (("humidity",), (
+        (30, False, "Low humidity (below 30%) may cause plant dehydration."),
+        (80, True, "Humidity levels are moderate."),
+        (None, True, "High humidity (above 80%) may promote fungal diseases like late blight."),
+    )),
+    (("soil_moisture", "soilMoisture"), (
+        (300, False, "Soil is very dry — water plants immediately."),
+        (500, False, "Soil is becoming dry — consider watering soon."),
+        (800, True, "Soil moisture is in a good range."),
+        (None, True, "Soil may be waterlogged — ensure proper drainage to prevent root rot."),
+    )),
+    (("light", "lightLevel"), (
+        (200, False, "Light level is very high — plants are getting strong sunlight."),
+        (500, False, "Light level is good for plant growth."),
+        (800, True, None),
+        (None, True, "Light level is low — plants may not be getting enough sunlight for optimal photosynthesis."),
+    )),
+)
 
-# Helper: sensor analysis with light sensor support
+# Helper: sensor analysis driven by the threshold table above
 def analyze_sensor_data(data):
     advice = []
-    
-    # Extract fields with safety checks
-    temp = data.get("temperature")
-    humidity = data.get("humidity")
-    # Check both keys since the ESP32 uses soil_moisture but our function expects soil_moisture
-    soil_moisture = data.get("soil_moisture", data.get("soilMoisture"))
-    # Check both keys for light
-    light = data.get("light", data.get("lightLevel"))
-    
-    # Log received sensor values
-    print(f"🌡️ Temperature: {temp}°C") if temp is not None else print("❌ No temperature data")
-    print(f"💧 Humidity: {humidity}%") if humidity is not None else print("❌ No humidity data")
-    print(f"🌱 Soil Moisture: {soil_moisture}") if soil_moisture is not None else print("❌ No soil moisture data")
-    print(f"☀️ Light Level: {light}") if light is not None else print("❌ No light data")
-
-    if temp is not None:
-        if temp > 35:
-            advice.append("Temperature is high (above 35°C) — consider shade or irrigation to cool plants.")
-        elif temp < 15:
-            advice.append("Temperature is low (below 15°C) — crop growth might slow down.")
-        elif 15 <= temp <= 25:
-            advice.append("Temperature is in optimal range for potato growth.")
-
-    if humidity is not None:
-        if humidity > 80:
-            advice.append("High humidity (above 80%) may promote fungal diseases like late blight.")
-        elif humidity < 30:
-            advice.append("Low humidity (below 30%) may cause plant dehydration.")
-        else:
-            advice.append("Humidity levels are moderate.")
-
-    if soil_moisture is not None:
-        if soil_moisture < 300:
-            advice.append("Soil is very dry — water plants immediately.")
-        elif soil_moisture < 500:
-            advice.append("Soil is becoming dry — consider watering soon.")
-        elif soil_moisture > 800:
-            advice.append("Soil may be waterlogged — ensure proper drainage to prevent root rot.")
-        else:
-            advice.append("Soil moisture is in a good range.")
-
-    # Add light level analysis
-    if light is not None:
-        if light < 200:
-            advice.append("Light level is very high — plants are getting strong sunlight.")
-        elif light < 500:
-            advice.append("Light level is good for plant growth.")
-        elif light > 800:
-            advice.append("Light level is low — plants may not be getting enough sunlight for optimal photosynthesis.")
-
+    for keys, bands in _SENSOR_RULES:
+        value = None
+        for key in keys:
+            value = data.get(key)
+            if value is not None:
+                break
+        if value is None:
+            continue
+        for bound, inclusive, message in bands:
+            if bound is None or value < bound or (inclusive and value == bound):
+                if message:
+                    advice.append(message)
+                break
     return advice
 
 # Helper: weather API
 def get_weather_data(lat=12.97, lon=77.59):
     if not WEATHER_API_KEY:
-        print("❌ Weather API key not set, skipping weather data")
+        logger.warning("Weather API key not set, skipping weather data")
         return None
+    key = (lat, lon)
+    hit = _WEATHER_CACHE.get(key)
+    if hit and time.monotonic() - hit[0] < _WEATHER_TTL:
+        return hit[1]
     try:
         params = {
             'lat': lat,
@@ -238,47 +415,55 @@ def get_weather_data(lat=12.97, lon=77.59):
             'appid': WEATHER_API_KEY,
             'units': 'metric'
         }
-        response = requests.get(WEATHER_API_URL, params=params, timeout=5)
+        response = _SESSION.get(WEATHER_API_URL, params=params, timeout=5)
         response.raise_for_status()
         data = response.json()
+        main = data.get('main', {})
+        weather = data.get('weather', [{}])[0]
         weather_data = {
-            'temperature': data.get('main', {}).get('temp'),
-            'humidity': data.get('main', {}).get('humidity'),
-            'conditions': data.get('weather', [{}])[0].get('main')
+            'temperature': main.get('temp'),
+            'humidity': main.get('humidity'),
+            'conditions': weather.get('main')
         }
-        print(f"🌤️ Weather data retrieved: {weather_data}")
+        with _WEATHER_CACHE_LOCK:
+            _WEATHER_CACHE[key] = (time.monotonic(), weather_data)
+        logger.info("Weather data retrieved: %s", weather_data)
         return weather_data
     except requests.RequestException as e:
-        print(f"❌ Weather API error: {str(e)}")
+        logger.warning("Weather API error: %s", e)
         return None
 
+# Remedy recommendations, built once at import — get_remedy previously
+# reconstructed this dict on every call
+_REMEDIES = {
+    "Potato___Early_blight": (
+        "1. Remove and destroy infected leaves immediately\n"
+        "2. Apply copper-based fungicide every 7-10 days\n"
+        "3. Improve air circulation between plants\n"
+        "4. Water at the base of plants to keep foliage dry\n"
+        "5. Rotate crops in the future to prevent disease buildup"
+    ),
+    "Potato___Late_blight": (
+        "1. Apply fungicides with chlorothalonil or copper-based products\n"
+        "2. Remove and destroy infected plants completely\n"
+        "3. Avoid overhead watering and irrigate in the morning\n"
+        "4. Increase plant spacing to improve air circulation\n"
+        "5. Consider harvesting early if disease is widespread"
+    ),
+    "Potato___Healthy": (
+        "Your potato plants appear healthy. Maintain good growing conditions:\n"
+        "1. Continue balanced watering\n"
+        "2. Apply fertilizer according to growth stage\n"
+        "3. Monitor for pest activity\n"
+        "4. Maintain good air circulation"
+    ),
+    "No_image_provided": "No image was provided for disease detection. Monitoring sensor data only."
+}
+_DEFAULT_REMEDY = "Consult an agricultural expert for diagnosis and treatment."
+
 # Helper: remedy with expanded recommendations
 def get_remedy(disease):
-    remedies = {
-        "Potato___Early_blight": (
-            "1. Remove and destroy infected leaves immediately\n"
-            "2. Apply copper-based fungicide every 7-10 days\n"
-            "3. Improve air circulation between plants\n"
-            "4. Water at the base of plants to keep foliage dry\n"
-            "5. Rotate crops in the future to prevent disease buildup"
-        ),
-        "Potato___Late_blight": (
-            "1. Apply fungicides with chlorothalonil or copper-based products\n"
-            "2. Remove and destroy infected plants completely\n"
-            "3. Avoid overhead watering and irrigate in the morning\n"
-            "4. Increase plant spacing to improve air circulation\n"
-            "5. Consider harvesting early if disease is widespread"
-        ),
-        "Potato___Healthy": (
-            "Your potato plants appear healthy. Maintain good growing conditions:\n"
-            "1. Continue balanced watering\n"
-            "2. Apply fertilizer according to growth stage\n"
-            "3. Monitor for pest activity\n"
-            "4. Maintain good air circulation"
-        ),
-        "No_image_provided": "No image was provided for disease detection. Monitoring sensor data only."
-    }
-    return remedies.get(disease, "Consult an agricultural expert for diagnosis and treatment.")
+    return _REMEDIES.get(disease, _DEFAULT_REMEDY)
 
 @app.route("/")
 def home():
@@ -293,17 +478,17 @@ def check_status():
     status = {
         "status": "running",
         "model_loaded": interpreter is not None,
+        "onnx_session_loaded": onnx_session is not None,
         "model_file_exists": model_file_exists,
         "model_path": MODEL_PATH,
         "weather_api": WEATHER_API_KEY is not None
     }
     
-    return jsonify(status)
+    return _json_response(status)
 
-# Start app
+# Start app (development only — production runs under gunicorn, see Procfile)
 if __name__ == '__main__':
-    os.makedirs('uploads', exist_ok=True)
-    print("✅ AgriTech Backend Starting...")
-    print("✅ Weather API Key Loaded:", WEATHER_API_KEY is not None)
-    print(f"✅ Model file exists: {os.path.exists(MODEL_PATH)}")
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=True)
\ No newline at end of file
+    logger.info("AgriTech Backend Starting...")
+    logger.info("Weather API Key Loaded: %s", WEATHER_API_KEY is not None)
+    logger.info("Model file exists: %s", os.path.exists(MODEL_PATH))
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
@@ -1,41 +1,175 @@
+import os
+import random
+from glob import glob
+
+# Must be set before TensorFlow is imported: routes CPU Conv2D/Dense to
+# oneDNN's AVX2/AVX-512 JIT microkernels (NHWC, the Keras default layout)
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '1')
+
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+import tensorflow_model_optimization as tfmot
+from tensorflow.keras import mixed_precision
+
+# Keep the global policy at float32: tfmot's QAT wrappers only support
+# float32 layers, and quantize_model below raises on a mixed_bfloat16
+# model. The int8 fake-quant nodes deliver the deployment-side precision
+# win instead.
+mixed_precision.set_global_policy('float32')
+
+# Data-parallel replicas across all visible GPUs (single replica on a
+# CPU-only or one-GPU host, where this is a no-op)
+strategy = tf.distribute.MirroredStrategy()
 
-# Data augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    validation_split=0.2
-)
+# Larger batches raise GEMM efficiency and amortize per-step overhead —
+# the model is small enough that 128 FP32 activations fit comfortably.
+# Scaled per replica so each GPU keeps a full batch.
+BATCH = 128 * strategy.num_replicas_in_sync
 
 # Load data
-train_generator = train_datagen.flow_from_directory(
-    'dataset',
-    target_size=(256, 256),
-    batch_size=32,
-    class_mode='categorical',
-    subset='training'
-)
-
-# Build model
-model = tf.keras.Sequential([
-    tf.keras.layers.Conv2D(32, (3,3), activation='relu', input_shape=(256, 256, 3)),
-    tf.keras.layers.MaxPooling2D(2,2),
-    tf.keras.layers.Flatten(),
-    tf.keras.layers.Dense(128, activation='relu'),
-    tf.keras.layers.Dense(3, activation='softmax')  # 3 classes
+class_names = sorted(entry.name for entry in os.scandir('dataset') if entry.is_dir())
+class_table = tf.constant(class_names)
+
+# Materialize the file list once — list_files re-globbed and stat()ed the
+# whole tree each time the dataset was re-instantiated. The train/validation
+# split is fixed up front on a seeded Python shuffle, and per-epoch shuffling
+# happens as a Dataset op over the constant path tensor.
+paths = sorted(glob('dataset/*/*.jpg'))
+random.Random(0).shuffle(paths)
+train_paths = paths[int(0.2 * len(paths)):]  # hold out 20% for validation
+
+def process_path(path):
+    # One-hot label from the parent directory name, matching class_mode='categorical'
+    label = tf.cast(tf.strings.split(path, os.sep)[-2] == class_table, tf.float32)
+    img = tf.io.read_file(path)
+    img = tf.io.decode_jpeg(img, channels=3)
+    img = tf.image.resize(img, (256, 256))
+    return img, label
+
+# Augmentation stays outside the model: exported graphs must take the same
+# [0, 1] float inputs that app.py's float serving branches produce with
+# their /255 preprocessing (an in-graph Rescaling would double-normalize on
+# the ONNX and FP16 paths), and tfmot's QAT wrappers below cannot quantize
+# the random preprocessing layers. The layers still run batched as fused
+# graph ops inside the .map.
+augment = tf.keras.Sequential([
+    tf.keras.layers.Rescaling(1. / 255),
+    tf.keras.layers.RandomRotation(20 / 360),
 ])
 
-# Compile and train
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-model.fit(train_generator, epochs=10)
+train_files = tf.data.Dataset.from_tensor_slices(tf.constant(train_paths))
+train_ds = train_files.interleave(
+    lambda p: tf.data.Dataset.from_tensors(p).map(process_path),
+    cycle_length=tf.data.AUTOTUNE,
+    num_parallel_calls=tf.data.AUTOTUNE)
+# Cache decoded+resized tensors on disk: epoch 1 pays the JPEG decode once,
+# epochs 2-10 stream from the memory-mapped cache and skip libjpeg entirely.
+# Augmentation stays after the cache so it re-randomizes every epoch.
+train_ds = train_ds.cache('dataset_cache')
+# Shuffle after the cache so each epoch replays the cached elements in a new
+# order — shuffling before it would bake epoch 1's order into the cache file
+# and replay it verbatim every epoch. The buffer is bounded because the
+# elements here are decoded 256x256x3 images, not paths.
+train_ds = train_ds.shuffle(1000, seed=0, reshuffle_each_iteration=True)
+train_ds = train_ds.batch(BATCH)
+# Vectorized mapping: batching comes first, so the augmentation layers see
+# (BATCH, 256, 256, 3) NHWC tensors and rotate and rescale a whole batch
+# per graph dispatch; after the cache, so rotations re-randomize each epoch
+train_ds = train_ds.map(lambda x, y: (augment(x, training=True), y),
+                        num_parallel_calls=tf.data.AUTOTUNE)
+# Double-buffer the pipeline so the next batch is decoded while the current
+# one trains (prefetch returns a new dataset — assigning it back matters)
+train_ds = train_ds.prefetch(tf.data.AUTOTUNE)
+
+# Build model under the strategy scope so variables are mirrored across
+# replicas. The model takes the pipeline's rescaled [0, 1] floats — see the
+# augment stage above for why preprocessing is not part of the graph.
+with strategy.scope():
+    model = tf.keras.Sequential([
+        # Stride 2 downsamples in the conv itself: the activation volume is
+        # 128x128x32 instead of 254x254x32, quartering the bytes every
+        # downstream op has to move
+        tf.keras.layers.Conv2D(32, (3,3), strides=2, padding='same', activation='relu',
+                               input_shape=(256, 256, 3)),
+        tf.keras.layers.MaxPooling2D(2,2),
+        # GAP feeds Dense(128) a 32-wide vector; Flatten fed it 127*127*32 =
+        # 516k inputs, i.e. ~66M weights in the first Dense layer alone
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(128, activation='relu'),
+        tf.keras.layers.Dense(3, activation='softmax')  # 3 classes
+    ])
+
+    # Compile and train. jit_compile=True runs the step through XLA, fusing
+    # the conv/dense chain into a few kernels; the explicit Adam instance
+    # likewise compiles its m/v moment updates into one fused pass per
+    # variable. steps_per_execution keeps 32 batches inside one tf.function
+    # call so the Python fit loop and callbacks fire once per 32 steps —
+    # all of which matters on a model whose per-op dispatch overhead rivals
+    # its compute.
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=1e-3, jit_compile=True),
+                  loss='categorical_crossentropy', metrics=['accuracy'],
+                  steps_per_execution=32, jit_compile=True)
+
+model.fit(train_ds, epochs=10)
+
+# OPTIONAL: Save original model (Keras v3 zip — faster save/load than the
+# legacy HDF5 file and no per-weight metadata overhead; anything needing
+# tf.function signatures uses the saved_model/ export below)
+model.save('model.keras')
+
+# Convert from a SavedModel export rather than the in-memory Keras object —
+# that path preserves the tf.function signature, enabling grappler constant
+# folding and conv/activation fusion that from_keras_model can miss. This
+# export is the plain float graph; the QAT pass below gets its own.
+model.export('saved_model')
+
+# ✅ Emit an FP16 variant for x86/GPU deployments, where int8 requantization
+# overhead can erase the quantization win — FP16 halves the weight bandwidth
+# while keeping float kernels. Converted from the float export: the QAT
+# graph's fake-quant nodes would make the converter emit int8 regardless of
+# supported_types.
+fp16_converter = tf.lite.TFLiteConverter.from_saved_model('saved_model')
+fp16_converter.optimizations = [tf.lite.Optimize.DEFAULT]
+fp16_converter.target_spec.supported_types = [tf.float16]
+with open("model_fp16.tflite", "wb") as f:
+    f.write(fp16_converter.convert())
+
+print("FP16 model saved as model_fp16.tflite")
+
+# Quantization-aware fine-tune: fake-quant nodes ride along in the
+# forward/backward pass so the int8 scales are learned with the weights,
+# instead of being estimated after the fact — post-training calibration
+# alone tends to cost accuracy on a model this small. A short pass at a
+# lower learning rate is enough since the weights start from the converged
+# float model. No XLA here: the fake-quant ops don't fuse usefully and the
+# pass is only two epochs.
+with strategy.scope():
+    qat_model = tfmot.quantization.keras.quantize_model(model)
+    qat_model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=1e-4),
+                      loss='categorical_crossentropy', metrics=['accuracy'],
+                      steps_per_execution=32)
+
+qat_model.fit(train_ds, epochs=2)
+qat_model.export('saved_model_qat')
 
-# OPTIONAL: Save original model
-model.save('model.h5')
+# ✅ Convert to a fully-integer int8 TFLite model. Optimize.DEFAULT alone
+# gives dynamic-range quantization, which re-casts activations to float at
+# every op and is frequently slower than FP32; calibrating with a
+# representative dataset fixes the activation scales so convolutions run
+# as true int8 GEMMs end-to-end.
+def representative_dataset():
+    for image, _ in train_ds.unbatch().take(200):
+        yield [tf.expand_dims(image, 0)]
 
-# ✅ Convert to quantized TFLite model
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-converter.optimizations = [tf.lite.Optimize.DEFAULT]  # Enable quantization
+converter = tf.lite.TFLiteConverter.from_saved_model('saved_model_qat')
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.representative_dataset = representative_dataset
+converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+# Weights stay per-channel quantized (the default). Do NOT set
+# experimental_disable_per_channel: per-tensor weight scales break
+# XNNPACK's fast int8 conv kernels and fall back to reference ops.
+# uint8 I/O so the backend can feed raw pixels with no float preprocessing
+converter.inference_input_type = tf.uint8
+converter.inference_output_type = tf.uint8
 tflite_quant_model = converter.convert()
 
 # ✅ Save the quantized TFLite model